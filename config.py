@@ -7,14 +7,21 @@ DEFAULT_BAUD = 115200
 
 # Session Markers
 DEFAULT_SESSION_MARKER = "::RPI-PICO-LOG::START"
+SESSION_MARKER_BYTES = DEFAULT_SESSION_MARKER.encode("utf-8")  # for pre-decode checks
 READY_MESSAGE = "::RPI-ZERO-LOG::READY"
+READY_MESSAGE_BYTES = f"{READY_MESSAGE}\n".encode("utf-8")  # sent as-is during handshake
 
 # Connection Settings
 SERIAL_TIMEOUT = 0.1  # seconds
-SERIAL_READ_CHUNK_SIZE = 1024  # bytes
+SERIAL_READ_CHUNK_SIZE = 8192  # bytes - max per read(); a read returns early on SERIAL_TIMEOUT
+SERIAL_BUFFER_SIZE = SERIAL_READ_CHUNK_SIZE * 4  # bytes - initial line buffer (grows for longer lines)
 INITIAL_BACKOFF = 0.5  # seconds
 MAX_BACKOFF = 5.0  # seconds
+BACKOFF_JITTER = 0.25  # fraction of backoff added as random jitter
+FAST_RETRY_COUNT = 3  # quick reconnect attempts before exponential backoff
+FAST_RETRY_INTERVAL = 0.1  # seconds
 RECONNECT_RETRY_INTERVAL = 0.5  # seconds
+PORT_CACHE_TTL = 1.0  # seconds - comports() results reused for back-to-back scans
 
 # Handshake Settings
 HANDSHAKE_SEND_INTERVAL = 0.5  # seconds - how often to send READY message
@@ -30,7 +37,13 @@ DATE_FORMAT = "%d-%m-%Y"
 TIMESTAMP_FORMAT = "%d-%m-%Y %H:%M:%S"
 SESSION_FILE_PATTERN = "session-{:03d}.log"
 DATA_FILE_PATTERN = "data-{:03d}.log"  # Pattern for data files
+SESSION_INDEX_FILE = ".session_index"  # Last used session number, kept per date folder
 DATA_LINE_PREFIX = "[D]"  # Prefix that identifies data lines
+DATA_LINE_PREFIX_BYTES = DATA_LINE_PREFIX.encode("utf-8")  # lines are recorded as bytes
+FILE_BUFFER_SIZE = 64 * 1024  # bytes - write buffer per open log/data file
+FILE_FLUSH_INTERVAL = 1.0  # seconds - max time buffered lines wait before flush
+DATE_CHECK_INTERVAL = 60.0  # seconds - max time between date rollover checks
+URING_ENTRIES = 64  # io_uring submission queue size (--io-uring, Linux only)
 
 # Threading
 THREAD_JOIN_TIMEOUT = 2.0  # seconds
@@ -39,9 +52,19 @@ THREAD_JOIN_TIMEOUT = 2.0  # seconds
 UPLOAD_FOLDER = "upload_binary"
 PICO_DRIVE_LABEL = "RPI-RP2"
 UPLOAD_COMMAND = "::RPI-ZERO-LOG::UPLOAD"
+UPLOAD_COMMAND_BYTES = f"{UPLOAD_COMMAND}\n".encode("utf-8")  # sent as-is to the Pico
 UF2_DETECT_TIMEOUT = 20.0  # seconds to wait for UF2 drive to appear
+UF2_POLL_INTERVAL = 0.5  # seconds between drive checks when not woken by events
 UF2_COPY_RETRY = 3  # attempts to copy UF2 file
 UF2_COPY_WAIT = 0.5  # seconds between copy retries
+UF2_COPY_WORKERS = 2  # UF2 files copied concurrently
+
+# Server communication
+SERVER_TIMEOUT = 10.0  # seconds per request (connect and read)
+SERVER_RETRIES = 3  # retries on connection errors and 429/5xx responses
+SERVER_BACKOFF_FACTOR = 0.5  # seconds - exponential backoff base between retries
+UPLOAD_GZIP_LEVEL = 1  # gzip level for log uploads (1 = fastest)
 
 # Commands that can be sent from the Pico to the Zero
 SHUTDOWN_COMMAND = "::RPI-ZERO-LOG::SHUTDOWN"
+SHUTDOWN_COMMAND_BYTES = SHUTDOWN_COMMAND.encode("utf-8")  # for pre-decode checks
@@ -0,0 +1,76 @@
+"""
+Console mirroring of received lines.
+Keeps tty/pipe output off the disk-writing path of the main loop.
+"""
+
+import io
+import sys
+import threading
+
+from config import FILE_BUFFER_SIZE, QUEUE_TIMEOUT
+from spsc_queue import SPSCQueue
+
+
+class ConsoleWriterThread(threading.Thread):
+    """
+    Thread that mirrors received lines to stdout.
+
+    Handles:
+    - Batching: takes every queued batch and writes them with one call
+    - Decoupling: handing a batch over never blocks, so a slow terminal
+      never back-pressures disk writes (new batches are dropped instead
+      when the queue is full)
+    - Graceful shutdown via stop event (remaining batches are written)
+    """
+
+    def __init__(self, in_q: SPSCQueue, stop_evt: threading.Event):
+        """
+        Initialize console writer thread.
+
+        Args:
+            in_q: Bounded queue of line batches (lists of raw bytes lines) to print
+            stop_evt: Event to signal thread shutdown
+        """
+        super().__init__(daemon=True)
+        self.in_q = in_q
+        self.stop_evt = stop_evt
+        # Own buffered writer on fd 1: under `python -u` (as the launchers
+        # run it) sys.stdout.buffer is unbuffered and every batch would be
+        # a write() system call
+        try:
+            raw = io.FileIO(sys.stdout.fileno(), "wb", closefd=False)
+            self.out = io.BufferedWriter(raw, FILE_BUFFER_SIZE)
+        except (AttributeError, OSError, ValueError):
+            self.out = sys.stdout.buffer  # stdout replaced by a non-file stream
+        # Interactive terminals see every batch immediately; pipes/journald
+        # let the buffer fill and are flushed when idle or on exit
+        self.flush_each_batch = sys.stdout.isatty()
+
+    def submit(self, lines: list):
+        """Queue a batch of lines for printing; never blocks the caller."""
+        self.in_q.put(lines)
+
+    def run(self):
+        """Main thread loop - wait for batches and write them to stdout."""
+        while not self.stop_evt.is_set():
+            lines = self.in_q.get_all(timeout=QUEUE_TIMEOUT)
+            if lines:
+                self._write(lines)
+            else:
+                self.out.flush()
+
+        # Print whatever was queued before shutdown
+        lines = self.in_q.get_all(timeout=0)
+        if lines:
+            self._write(lines)
+        self.out.flush()
+
+    def _write(self, lines: list):
+        """Write lines to stdout with a single write (bytes pass through as-is)."""
+        view = memoryview(b"\n".join(lines) + b"\n")
+        # An unbuffered stdout may accept only part of the batch (e.g. after
+        # EINTR); write until every byte is out
+        while view:
+            view = view[self.out.write(view) :]
+        if self.flush_each_batch:
+            self.out.flush()
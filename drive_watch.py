@@ -0,0 +1,109 @@
+"""
+Event-driven waiting for removable drives (e.g. the Pico UF2 drive) to appear.
+Linux only; optionally uses the `pyudev` package for block device hotplug events.
+"""
+
+import os
+import select
+import time
+
+try:
+    import pyudev
+except ImportError:  # optional dependency; mount table events are used alone
+    pyudev = None
+
+from config import UF2_POLL_INTERVAL
+
+_MOUNTS_PATH = "/proc/self/mounts"
+
+
+class DriveWatcher:
+    """
+    Sleeps until the set of drives may have changed.
+
+    On Linux the kernel flags /proc/self/mounts with POLLPRI whenever the
+    mount table changes, so an automounted drive wakes the waiter at once.
+    With pyudev installed, block device "add" events (drives that are not
+    automounted) wake it too, and no periodic polling is needed at all.
+    Elsewhere wait() simply sleeps for the poll interval.
+
+    Features:
+    - wait() returns True only when woken by an event, so callers can skip
+      re-enumerating drives on a plain timeout
+    - `event_driven` tells whether every kind of drive arrival is covered
+      by events (otherwise callers keep checking every poll interval)
+    - Usable as a context manager; close() releases the watched fds
+    """
+
+    def __init__(self, poll_interval: float = UF2_POLL_INTERVAL):
+        """
+        Start watching for drive changes.
+
+        Args:
+            poll_interval: Longest wait when arrivals are not fully event-driven
+        """
+        self.poll_interval = poll_interval
+        self._poller = None
+        self._mounts = None
+        self._monitor = None
+
+        if not hasattr(select, "poll") or not os.path.exists(_MOUNTS_PATH):
+            return
+        try:
+            self._mounts = open(_MOUNTS_PATH, "rb")
+        except OSError:
+            return
+        self._poller = select.poll()
+        self._poller.register(self._mounts.fileno(), select.POLLPRI)
+
+        if pyudev is not None:
+            try:
+                monitor = pyudev.Monitor.from_netlink(pyudev.Context())
+                monitor.filter_by("block")
+                monitor.start()
+            except Exception:
+                return
+            self._monitor = monitor
+            self._poller.register(monitor.fileno(), select.POLLIN)
+
+    @property
+    def event_driven(self) -> bool:
+        """True if mounts and unmounted block devices both raise events."""
+        return self._monitor is not None
+
+    def wait(self, timeout: float) -> bool:
+        """
+        Block until a drive may have appeared or the timeout passes.
+
+        Args:
+            timeout: Seconds to wait (capped at poll_interval unless event_driven)
+
+        Returns:
+            True if woken by a mount table or block device event
+        """
+        if not self.event_driven:
+            timeout = min(timeout, self.poll_interval)
+        if self._poller is None:
+            time.sleep(max(0.0, timeout))
+            return False
+
+        events = self._poller.poll(max(0.0, timeout) * 1000)
+        if self._monitor is not None:
+            # Drain queued udev events; only the wake-up matters
+            while self._monitor.poll(timeout=0) is not None:
+                pass
+        return bool(events)
+
+    def close(self):
+        """Stop watching and release file descriptors."""
+        if self._mounts is not None:
+            self._mounts.close()
+            self._mounts = None
+        self._monitor = None
+        self._poller = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
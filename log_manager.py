@@ -3,6 +3,7 @@ Log file management and coordination.
 Handles session-based log files organized by date.
 """
 
+import os
 import time
 from pathlib import Path
 
@@ -10,9 +11,110 @@ from config import (
     DATE_FORMAT,
     SESSION_FILE_PATTERN,
     DATA_FILE_PATTERN,
-    DATA_LINE_PREFIX,
+    SESSION_INDEX_FILE,
+    DATA_LINE_PREFIX_BYTES,
+    FILE_BUFFER_SIZE,
+    FILE_FLUSH_INTERVAL,
+    DATE_CHECK_INTERVAL,
 )
-from utils import now_ts
+from utils import now_ts, MarkerLine
+from uring_writer import UringWriter
+
+# O_BINARY keeps Windows from translating b"\n" to b"\r\n" (0 elsewhere)
+_APPEND_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_APPEND | getattr(os, "O_BINARY", 0)
+
+# Scatter-gather writes are POSIX-only; Windows falls back to join + os.write
+_HAS_WRITEV = hasattr(os, "writev")
+_IOV_MAX = os.sysconf("SC_IOV_MAX") if _HAS_WRITEV else 0
+
+
+class AppendOnlyFile:
+    """
+    Append-only file written with os.write() from an in-memory chunk list.
+
+    Replaces open(..., "a", encoding="utf-8"): lines arrive from the serial
+    reader as bytes, so there is no TextIOWrapper encode step and no extra
+    copy through BufferedWriter. Written chunks are collected until
+    `buffer_size` bytes are pending (or flush() is called) and then handed
+    to the kernel as-is with os.writev() (one syscall per IOV_MAX chunks,
+    no joining copy). Platforms without writev join and use os.write().
+    With a UringWriter the flush is submitted asynchronously instead.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        buffer_size: int = FILE_BUFFER_SIZE,
+        uring: UringWriter = None,
+    ):
+        """
+        Open (or create) the file for appending.
+
+        Args:
+            path: File to append to
+            buffer_size: Pending bytes that trigger an automatic flush
+            uring: Optional io_uring writer to submit flushes through
+        """
+        self.path = path
+        self.buffer_size = buffer_size
+        self.uring = uring
+        self.fd = os.open(path, _APPEND_FLAGS, 0o644)
+        self._pending = []
+        self._pending_size = 0
+
+    def write(self, data: bytes):
+        """Queue bytes for writing; flushes once buffer_size bytes are pending."""
+        self._pending.append(data)
+        self._pending_size += len(data)
+        if self._pending_size >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        """Write all pending bytes to the OS (retrying short writes)."""
+        if not self._pending:
+            return
+        pending = self._pending
+        self._pending = []
+        self._pending_size = 0
+
+        if self.uring:
+            self.uring.submit(self.fd, pending)
+            return
+
+        if not _HAS_WRITEV:
+            self._write_all(pending[0] if len(pending) == 1 else b"".join(pending))
+            return
+
+        fd = self.fd
+        while pending:
+            iov = pending[:_IOV_MAX]
+            written = os.writev(fd, iov)
+            if written == sum(map(len, iov)):
+                del pending[:_IOV_MAX]
+                continue
+            # Short write: drop fully written chunks, then finish the partial one
+            for i, chunk in enumerate(iov):
+                if written < len(chunk):
+                    break
+                written -= len(chunk)
+            self._write_all(memoryview(chunk)[written:])
+            del pending[: i + 1]
+
+    def _write_all(self, data):
+        """os.write() until every byte of `data` is written."""
+        view = memoryview(data)
+        while view:
+            written = os.write(self.fd, view)
+            view = view[written:]
+
+    def close(self):
+        """Flush pending bytes and close the file descriptor."""
+        try:
+            self.flush()
+            if self.uring:
+                self.uring.wait(self.fd)
+        finally:
+            os.close(self.fd)
 
 
 class FileRecorder:
@@ -27,7 +129,14 @@ class FileRecorder:
     - Session numbering auto-detects highest existing session
     """
 
-    def __init__(self, base_dir: Path, session_marker: str, data_dir: Path = None):
+    def __init__(
+        self,
+        base_dir: Path,
+        session_marker: str,
+        data_dir: Path = None,
+        io_uring: bool = False,
+        verbose: bool = False,
+    ):
         """
         Initialize file recorder.
 
@@ -35,36 +144,96 @@ class FileRecorder:
             base_dir: Base directory for logs (e.g., 'logs/')
             session_marker: String that triggers new session creation
             data_dir: Base directory for data files (e.g., 'data/'). If None, data recording disabled.
+            io_uring: Submit file writes through io_uring (Linux, needs liburing).
+                Falls back to os.writev if unavailable.
+            verbose: Print a message whenever a session file is created or rolled
         """
         self.base_dir = Path(base_dir)
         self.data_dir = Path(data_dir) if data_dir else None
         self.session_marker = session_marker
+        self.verbose = verbose
+        # Lines arrive as bytes, so the marker is matched as bytes
+        self.session_marker_b = session_marker.encode("utf-8") if session_marker else None
         self.cur_date = time.strftime(DATE_FORMAT)
+        self._folder_cache = {}  # is_data -> folder for cur_date (already created)
         self.session_index = self._get_next_session_index()
-        self.cur_file = None
-        self.cur_data_file = None  # Separate file handle for data lines
+        self.uring = None
+        if io_uring:
+            try:
+                self.uring = UringWriter()
+            except (RuntimeError, OSError) as e:
+                print(f"io_uring unavailable ({e}); using os.writev", flush=True)
+        self.cur_session_name = None  # File name of the open session log
+        self.cur_file = None  # AppendOnlyFile for the session log
+        self.cur_data_file = None  # Separate AppendOnlyFile for data lines
+        self.last_flush_ts = time.monotonic()
+        self._next_date_check = self._compute_next_date_check()
+
+        # Specialise the run writer once instead of testing data_dir per batch
+        if self.data_dir:
+            self._write_run = self._write_log_and_data_run
+
+    def _compute_next_date_check(self) -> float:
+        """
+        Return the epoch time at which the date should be checked again.
+
+        This is the next local midnight, capped at DATE_CHECK_INTERVAL from
+        now so clock adjustments (e.g. NTP sync on a Pi without RTC) are
+        picked up quickly.
+        """
+        now = time.time()
+        t = time.localtime(now)
+        # mktime normalises day overflow (e.g. 32nd -> 1st of next month)
+        midnight = time.mktime(
+            (t.tm_year, t.tm_mon, t.tm_mday + 1, 0, 0, 0, 0, 0, -1)
+        )
+        return min(midnight, now + DATE_CHECK_INTERVAL)
 
     def _folder(self, is_data: bool = False) -> Path:
         """
         Get or create folder for current date.
 
+        The folder is created once per date and cached, so session rolls do
+        not repeat the mkdir()/stat() calls. The cache is cleared on date
+        rollover.
+
         Args:
             is_data: If True, returns data folder; otherwise returns log folder
         """
-        base = self.data_dir if is_data and self.data_dir else self.base_dir
-        d = base / self.cur_date
-        d.mkdir(parents=True, exist_ok=True)
+        d = self._folder_cache.get(is_data)
+        if d is None:
+            base = self.data_dir if is_data and self.data_dir else self.base_dir
+            d = base / self.cur_date
+            d.mkdir(parents=True, exist_ok=True)
+            self._folder_cache[is_data] = d
         return d
 
     def _get_next_session_index(self) -> int:
         """
         Find the highest existing session number and return next index.
-        Checks both log and data folders to keep them synchronized.
+
+        Reads the SESSION_INDEX_FILE sidecar written on every session roll.
+        The sidecar is only trusted if the session files it points to do not
+        exist yet (it goes stale if saving it failed or files were written
+        by another build). Otherwise scans both log and data folders
+        (keeping them synchronized).
         """
+        log_folder = self._folder(is_data=False)
+        try:
+            index = int((log_folder / SESSION_INDEX_FILE).read_text()) + 1
+        except (OSError, ValueError):
+            index = None
+        if index is not None and index > 0:
+            taken = (log_folder / SESSION_FILE_PATTERN.format(index)).exists()
+            if not taken and self.data_dir:
+                data_folder = self._folder(is_data=True)
+                taken = (data_folder / DATA_FILE_PATTERN.format(index)).exists()
+            if not taken:
+                return index
+
         session_numbers = []
 
         # Check log folder
-        log_folder = self._folder(is_data=False)
         existing_log_sessions = list(log_folder.glob("session-*.log"))
         for f in existing_log_sessions:
             try:
@@ -90,40 +259,85 @@ class FileRecorder:
 
     def _roll_session(self):
         """Close current files and open new session files for both logs and data."""
-        # Close and open log file
+        # Close (flushes pending lines) and open log file
         if self.cur_file:
             self.cur_file.close()
-        fname = SESSION_FILE_PATTERN.format(self.session_index)
-        self.cur_file = open(
-            self._folder(is_data=False) / fname, "a", encoding="utf-8", buffering=1
+        self.cur_session_name = SESSION_FILE_PATTERN.format(self.session_index)
+        self.cur_file = AppendOnlyFile(
+            self._folder(is_data=False) / self.cur_session_name, uring=self.uring
         )
 
         # Close and open data file if data directory is configured
         if self.data_dir:
             if self.cur_data_file:
                 self.cur_data_file.close()
-            data_fname = DATA_FILE_PATTERN.format(self.session_index)
-            self.cur_data_file = open(
-                self._folder(is_data=True) / data_fname,
-                "a",
-                encoding="utf-8",
-                buffering=1,
-            )
+            self._open_data_file()
+        self.last_flush_ts = time.monotonic()
+        self._save_session_index()
+
+    def _save_session_index(self):
+        """Record the current session number in the date folder's sidecar file (atomic replace)."""
+        sidecar = self._folder(is_data=False) / SESSION_INDEX_FILE
+        tmp = sidecar.with_name(SESSION_INDEX_FILE + ".tmp")
+        try:
+            tmp.write_text(str(self.session_index))
+            os.replace(tmp, sidecar)
+        except OSError as e:
+            # Non-fatal: the next startup falls back to scanning the folders
+            print(f"Could not save session index: {e}", flush=True)
+
+    def _open_data_file(self):
+        """Open the data file matching the current session index."""
+        data_fname = DATA_FILE_PATTERN.format(self.session_index)
+        self.cur_data_file = AppendOnlyFile(
+            self._folder(is_data=True) / data_fname, uring=self.uring
+        )
+
+    def _start_new_session(self):
+        """Handle a session marker: bump the session index (if needed) and roll files."""
+        # If a file is already open, increment to create a new session
+        first = self.cur_file is None
+        if not first:
+            self.session_index += 1
+        self._roll_session()
+
+        if self.verbose:
+            if first:
+                msg = f"First session marker detected, creating {self.cur_session_name}"
+            else:
+                msg = f"Session marker detected, rolling to {self.cur_session_name}"
+            print(f"[{now_ts()}] {msg}", flush=True)
 
     def _maybe_roll_date(self):
         """Check if date has changed and roll to new date folder if needed."""
+        # Cheap time comparison on the hot path; strftime only when due
+        if time.time() < self._next_date_check:
+            return
+        self._next_date_check = self._compute_next_date_check()
+
         today = time.strftime(DATE_FORMAT)
         if today != self.cur_date:
-            # New date; create new session files
-            if self.cur_file:
-                self.cur_file.close()
-            if self.cur_data_file:
-                self.cur_data_file.close()
+            # New date; create new session files (_roll_session flushes and
+            # closes the files of the previous date)
             self.cur_date = today
+            self._folder_cache.clear()
             self.session_index = self._get_next_session_index()
             self._roll_session()
 
-    def write_line(self, line: str):
+    def _maybe_flush(self):
+        """Flush buffered lines if FILE_FLUSH_INTERVAL has elapsed since the last flush."""
+        if time.monotonic() - self.last_flush_ts >= FILE_FLUSH_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        """Push buffered lines of the current log and data files to the OS."""
+        if self.cur_file:
+            self.cur_file.flush()
+        if self.cur_data_file:
+            self.cur_data_file.flush()
+        self.last_flush_ts = time.monotonic()
+
+    def write_line(self, line: bytes, is_marker: bool = None):
         """
         Write a line to the appropriate log file(s).
 
@@ -131,55 +345,111 @@ class FileRecorder:
         - Other lines go only to log file
         - If line contains session marker, rolls to new session files
         - Automatically handles date rollovers
+        - Lines are block-buffered and flushed at most every FILE_FLUSH_INTERVAL
 
         Args:
-            line: Text line to write (without trailing newline)
+            line: Raw line to write (bytes, without trailing newline)
+            is_marker: Whether the line contains the session marker. If None,
+                MarkerLine instances are treated as markers and other lines
+                are searched for the marker.
         """
         self._maybe_roll_date()
 
-        if self.session_marker and self.session_marker in line:
-            # If a file is already open, increment to create a new session
-            if self.cur_file is not None:
-                self.session_index += 1
-                print(
-                    f"[{now_ts()}] Session marker detected, "
-                    f"rolling to {SESSION_FILE_PATTERN.format(self.session_index)}",
-                    flush=True,
-                )
-            else:
-                print(
-                    f"[{now_ts()}] First session marker detected, "
-                    f"creating {SESSION_FILE_PATTERN.format(self.session_index)}",
-                    flush=True,
-                )
-            self._roll_session()
+        if is_marker is None:
+            is_marker = isinstance(line, MarkerLine) or bool(
+                self.session_marker_b and self.session_marker_b in line
+            )
+
+        if is_marker:
+            self._start_new_session()
         else:
-            if self.cur_file is None:
-                self._roll_session()
+            # Same routing as a batch: a one-line run whose joined form is
+            # the line itself
+            self._write_run([line], line)
+            self._maybe_flush()
 
-            # Write to log file
-            self.cur_file.write(f"{line}\n")
-            self.cur_file.flush()
+    def write_lines(self, lines: list):
+        """
+        Write a batch of lines with one write() per file per run of lines.
+
+        Same routing rules as write_line(). The batch is split at session
+        markers; each run of ordinary lines between markers is joined and
+        written to the log file in a single call, and its data lines are
+        gathered and written to the data file in a single call.
+
+        Args:
+            lines: Raw lines to write (bytes, without trailing newlines)
+        """
+        self._maybe_roll_date()
+
+        marker = self.session_marker_b
+        blob = b"\n".join(lines)
+        # One C-level search over the joined batch covers the common no-marker
+        # case; only batches that contain a marker are walked line by line.
+        if not marker or marker not in blob:
+            self._write_run(lines, blob)
+        else:
+            start = 0
+            for i, line in enumerate(lines):
+                if isinstance(line, MarkerLine) or marker in line:
+                    self._write_run(lines[start:i])
+                    self._start_new_session()
+                    start = i + 1
+            self._write_run(lines[start:])
+
+        self._maybe_flush()
+
+    def _write_log_run(self, run: list, blob: bytes = None):
+        """
+        Write a run of non-marker lines to the log file.
+
+        Args:
+            run: Lines to write (none of them is a session marker)
+            blob: run already joined with newlines, if the caller has it
+        """
+        if not run:
+            return
+        if self.cur_file is None:
+            self._roll_session()
+
+        if blob is None:
+            blob = b"\n".join(run)
+        write = self.cur_file.write
+        write(blob)
+        write(b"\n")
+
+    def _write_log_and_data_run(self, run: list, blob: bytes = None):
+        """
+        Write a run of non-marker lines to the log file and data lines to the data file.
+
+        Args:
+            run: Lines to write (none of them is a session marker)
+            blob: run already joined with newlines, if the caller has it
+        """
+        self._write_log_run(run, blob)
+
+        prefix = DATA_LINE_PREFIX_BYTES
+        data_lines = [l for l in run if l.startswith(prefix)]
+        if data_lines:
+            if self.cur_data_file is None:
+                # Ensure data file is open (shouldn't happen if _roll_session works correctly)
+                self._open_data_file()
+            write = self.cur_data_file.write
+            write(b"\n".join(data_lines))
+            write(b"\n")
 
-            # If it's a data line, also write to data file
-            if self.data_dir and line.startswith(DATA_LINE_PREFIX):
-                if self.cur_data_file is None:
-                    # Ensure data file is open (shouldn't happen if _roll_session works correctly)
-                    data_fname = DATA_FILE_PATTERN.format(self.session_index)
-                    self.cur_data_file = open(
-                        self._folder(is_data=True) / data_fname,
-                        "a",
-                        encoding="utf-8",
-                        buffering=1,
-                    )
-                self.cur_data_file.write(f"{line}\n")
-                self.cur_data_file.flush()
+    # Without a data directory there is no data-line routing (see __init__)
+    _write_run = _write_log_run
 
     def close(self):
-        """Close the current log and data files."""
+        """Flush and close the current log and data files."""
+        self.flush()
         if self.cur_file:
             self.cur_file.close()
             self.cur_file = None
         if self.cur_data_file:
             self.cur_data_file.close()
             self.cur_data_file = None
+        if self.uring:
+            self.uring.close()
+            self.uring = None
@@ -5,8 +5,8 @@ Orchestrates serial reading, file recording, and (future) server uploads.
 """
 
 import argparse
+import logging
 import os
-import queue
 import threading
 from pathlib import Path
 
@@ -22,6 +22,8 @@ from config import (
 from utils import find_pico_port
 from serial_reader import SerialReaderThread
 from log_manager import FileRecorder
+from console_writer import ConsoleWriterThread
+from spsc_queue import SPSCQueue
 
 
 def run_threads(args):
@@ -33,9 +35,16 @@ def run_threads(args):
     """
     logs_dir = Path(args.log_dir).expanduser().resolve()
     data_dir = Path(args.data_dir).expanduser().resolve() if args.data_dir else None
-    recorder = FileRecorder(logs_dir, args.session_marker, data_dir=data_dir)
+    recorder = FileRecorder(
+        logs_dir,
+        args.session_marker,
+        data_dir=data_dir,
+        io_uring=args.io_uring,
+        verbose=args.verbose,
+    )
 
     # Port getter closure uses current args & auto-detect logic
+    # (find_pico_port reuses the last detected port while it is present)
     def _get_port():
         return find_pico_port(
             args.port,
@@ -46,27 +55,42 @@ def run_threads(args):
             args.platform,
         )
 
-    out_q: queue.Queue[str] = queue.Queue(maxsize=QUEUE_MAX_SIZE)
+    # Recorded lines must not be lost: the reader waits for room instead of
+    # dropping batches if disk writes fall behind
+    out_q = SPSCQueue(maxsize=QUEUE_MAX_SIZE, block=True)
     stop_evt = threading.Event()
 
-    reader = SerialReaderThread(_get_port, args.baud, out_q, stop_evt)
+    reader = SerialReaderThread(
+        _get_port, args.baud, out_q, stop_evt, session_marker=args.session_marker
+    )
     reader.start()
 
+    # Console mirroring runs in its own thread so tty I/O never stalls disk writes
+    console = None
+    if not args.quiet:
+        console = ConsoleWriterThread(SPSCQueue(maxsize=QUEUE_MAX_SIZE), stop_evt)
+        console.start()
+
     try:
         while True:
-            try:
-                line = out_q.get(timeout=QUEUE_TIMEOUT)
-            except queue.Empty:
+            # Take everything queued so the batch is written at once
+            batch = out_q.get_all(timeout=QUEUE_TIMEOUT)
+            if not batch:
+                # Idle: push out any lines still sitting in the file buffers
+                recorder.flush()
                 continue
-            # Print to console
-            print(f"{line}", flush=True)
+            # Mirror to console
+            if console:
+                console.submit(batch)
             # Record to file
-            recorder.write_line(line)
+            recorder.write_lines(batch)
     except KeyboardInterrupt:
         print(f"Exiting...", flush=True)
     finally:
-        stop_evt.set()
+        reader.stop()
         reader.join(timeout=THREAD_JOIN_TIMEOUT)
+        if console:
+            console.join(timeout=THREAD_JOIN_TIMEOUT)
         recorder.close()
 
 
@@ -129,9 +153,29 @@ def main():
         default=DEFAULT_SESSION_MARKER,
         help=f"Marker that triggers a new session file. Default: {DEFAULT_SESSION_MARKER!r}",
     )
+    parser.add_argument(
+        "--quiet",
+        action="store_true",
+        help="Do not mirror received lines to the console (lines are still recorded).",
+    )
+    parser.add_argument(
+        "--io-uring",
+        action="store_true",
+        help="Write log files through io_uring (Linux 5.1+, needs the 'liburing' package).",
+    )
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="Print status messages such as session file creation/rollover and port scans.",
+    )
 
     args = parser.parse_args()
 
+    # Port discovery logs through the `utils` logger; only --verbose shows it
+    logging.basicConfig(format="%(message)s")
+    if args.verbose:
+        logging.getLogger("utils").setLevel(logging.DEBUG)
+
     # Auto-detect platform if not specified
     if args.platform == "auto":
         if os.name == "nt":
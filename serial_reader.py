@@ -3,35 +3,72 @@ Serial connection and reading logic for communicating with Raspberry Pi Pico.
 """
 
 import time
+import random
 import threading
-import queue
 import serial
 import os
+import sys
+import errno
+import re
+import select
 import glob
-import shutil
 import platform
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 
 import psutil
-import ctypes
 
 from config import (
     DEFAULT_SESSION_MARKER,
-    READY_MESSAGE,
+    SESSION_MARKER_BYTES,
+    READY_MESSAGE_BYTES,
     SERIAL_TIMEOUT,
     SERIAL_READ_CHUNK_SIZE,
+    SERIAL_BUFFER_SIZE,
     INITIAL_BACKOFF,
     MAX_BACKOFF,
+    BACKOFF_JITTER,
+    FAST_RETRY_COUNT,
+    FAST_RETRY_INTERVAL,
     RECONNECT_RETRY_INTERVAL,
     HANDSHAKE_SEND_INTERVAL,
     UPLOAD_FOLDER,
     PICO_DRIVE_LABEL,
-    UPLOAD_COMMAND,
-    SHUTDOWN_COMMAND,
+    UPLOAD_COMMAND_BYTES,
+    SHUTDOWN_COMMAND_BYTES,
     UF2_DETECT_TIMEOUT,
     UF2_COPY_RETRY,
     UF2_COPY_WAIT,
+    UF2_COPY_WORKERS,
 )
+from utils import MarkerLine, copy_file, find_unmounted_device, get_volume_label
+from drive_watch import DriveWatcher
+from spsc_queue import SPSCQueue
+
+# Linux: wait with poll() and read straight from the port's fd into our
+# buffer with os.readv(). Not on macOS/BSD, whose poll() does not support
+# tty devices (POLLNVAL; pyserial uses select() there for this reason).
+_HAS_READV = sys.platform.startswith("linux") and hasattr(os, "readv")
+_RETRY_ERRNOS = (
+    errno.EAGAIN,
+    errno.EALREADY,
+    errno.EWOULDBLOCK,
+    errno.EINPROGRESS,
+    errno.EINTR,
+)
+
+_PLATFORM = platform.system()
+_IS_WINDOWS = _PLATFORM == "Windows"
+_PICO_LABEL_LOWER = PICO_DRIVE_LABEL.lower()
+_PICO_LABEL_LOWER_B = _PICO_LABEL_LOWER.encode("utf-8")
+_MOUNT_ESCAPE = re.compile(rb"\\([0-7]{3})")
+
+
+def _decode_mount_path(path: bytes) -> str:
+    """Decode a /proc/mounts path field (spaces etc. are octal-escaped)."""
+    if b"\\" in path:
+        path = _MOUNT_ESCAPE.sub(lambda m: bytes([int(m.group(1), 8)]), path)
+    return os.fsdecode(path)
 
 
 class SerialReaderThread(threading.Thread):
@@ -46,7 +83,12 @@ class SerialReaderThread(threading.Thread):
     """
 
     def __init__(
-        self, port_getter, baud: int, out_q: queue.Queue, stop_evt: threading.Event
+        self,
+        port_getter,
+        baud: int,
+        out_q: SPSCQueue,
+        stop_evt: threading.Event,
+        session_marker: str = DEFAULT_SESSION_MARKER,
     ):
         """
         Initialize serial reader thread.
@@ -54,22 +96,57 @@ class SerialReaderThread(threading.Thread):
         Args:
             port_getter: Callable that returns port name (or None)
             baud: Baud rate for serial connection
-            out_q: Queue to put decoded lines into
+            out_q: Queue to put batches of raw lines into (one list of bytes
+                per read, without line endings; marker lines as MarkerLine)
             stop_evt: Event to signal thread shutdown
+            session_marker: Marker whose lines are tagged as MarkerLine
         """
         super().__init__(daemon=True)
         self.port_getter = port_getter
         self.baud = baud
         self.out_q = out_q
         self.stop_evt = stop_evt
+        self.marker_b = session_marker.encode("utf-8") if session_marker else None
+        # Set while a handshake-completed connection is open; the marker line
+        # that completed the last handshake is kept for callers that want it
+        self.ready_event = threading.Event()
+        self.session_marker_line = None
         # Upload control primitives (can be triggered by external caller)
         self.upload_event = threading.Event()
         self.upload_lock = threading.Lock()
         self.upload_os_name = None
+        # Volume labels by device, so each drive's label is queried only once
+        self._known_devices = {}
+        # Trailing partial line carried between reads (shared by handshake and
+        # read loop). Allocated once and reused across reconnects; only the
+        # first self._pending bytes are valid.
+        self._buf = bytearray(SERIAL_BUFFER_SIZE)
+        self._view = memoryview(self._buf)
+        self._pending = 0
+        # File descriptor of the open port when it can be read directly (Linux),
+        # and a poll object with it registered (built once per connection)
+        self._fd = None
+        self._poller = None
+        # Self-pipe that wakes an idle read for stop() / upload requests;
+        # closed when run() exits (the lock keeps _wake() off a closed fd)
+        self._wake_r = self._wake_w = None
+        self._wake_lock = threading.Lock()
+        if _HAS_READV:
+            self._wake_r, self._wake_w = os.pipe()
+            os.set_blocking(self._wake_r, False)
+            os.set_blocking(self._wake_w, False)
 
     def run(self):
         """Main thread loop - connect, read, reconnect on failure."""
+        try:
+            self._run()
+        finally:
+            self._close_wake_pipe()
+
+    def _run(self):
+        """Connect, read and reconnect until the stop event is set."""
         backoff = INITIAL_BACKOFF
+        failures = 0  # consecutive disconnects/open failures
 
         while not self.stop_evt.is_set():
             port = self.port_getter()
@@ -80,85 +157,116 @@ class SerialReaderThread(threading.Thread):
             try:
                 with serial.Serial(port, self.baud, timeout=SERIAL_TIMEOUT) as ser:
                     print(f"Connected: {port}", flush=True)
-                    buf = bytearray()
+                    self._pending = 0
+                    self._connect_fd(ser)
                     backoff = INITIAL_BACKOFF  # reset backoff on success
+                    failures = 0
 
                     # Handshake: send READY until START marker is received
-                    if not self._perform_handshake(ser, buf):
+                    if not self._perform_handshake(ser):
                         continue  # Handshake failed or stop requested
 
                     # Continue with normal reading; the upload can be requested
                     # while we're in the read loop. _read_loop will handle upload_event.
-                    self._read_loop(ser, buf)
+                    self._read_loop(ser)
 
             except serial.SerialException as e:
                 print(f"Open failed for {port}: {e}", flush=True)
 
+            self.ready_event.clear()
             print(f"Disconnected, retrying...", flush=True)
-            time.sleep(backoff)
-            backoff = min(MAX_BACKOFF, backoff * 1.5)
+            failures += 1
+            if failures <= FAST_RETRY_COUNT:
+                # Transient USB drop: the port usually comes straight back
+                time.sleep(FAST_RETRY_INTERVAL)
+            else:
+                # Jitter avoids retrying in lock-step with the device's own restarts
+                time.sleep(backoff + random.uniform(0, backoff * BACKOFF_JITTER))
+                backoff = min(MAX_BACKOFF, backoff * 1.5)
 
-    def _perform_handshake(self, ser: serial.Serial, buf: bytearray) -> bool:
+    def _perform_handshake(self, ser: serial.Serial) -> bool:
         """
         Perform handshake with Pico.
 
-        Sends READY message repeatedly until START marker is received.
+        Sends READY message every HANDSHAKE_SEND_INTERVAL until START marker
+        is received. Reads are not delayed by the send interval: each read
+        returns within SERIAL_TIMEOUT, so the marker is handled as soon as
+        it arrives.
+        Complete lines received after the marker are kept in the line buffer
+        so the read loop picks them up.
 
         Args:
             ser: Open serial connection
-            buf: Buffer for accumulating data
 
         Returns:
             True if handshake successful, False if stopped or failed
         """
-        session_marker = DEFAULT_SESSION_MARKER
-        ready_msg = f"{READY_MESSAGE}\n".encode("utf-8")
-        found_marker = False
-
-        while not self.stop_evt.is_set() and not found_marker:
-            ser.write(ready_msg)
-            time.sleep(HANDSHAKE_SEND_INTERVAL)
-            chunk = ser.read(SERIAL_READ_CHUNK_SIZE)
-
-            if chunk:
-                buf.extend(chunk)
-                # Process all complete lines in buffer
-                while True:
-                    nl = buf.find(b"\n")
-                    if nl == -1:
-                        break
-                    raw = buf[:nl]
-                    del buf[: nl + 1]
-                    if raw.endswith(b"\r"):
-                        raw = raw[:-1]
-                    text = raw.decode("utf-8", errors="replace")
-
-                    if session_marker in text:
-                        found_marker = True
-                        self.out_q.put(text)
-                        break
-
-                    # If the Pico requests a shutdown during handshake
-                    if SHUTDOWN_COMMAND in text:
-                        try:
-                            self._handle_shutdown(ser)
-                        except Exception as e:
-                            print(f"Shutdown handling error: {e}", flush=True)
-                        return False
-
-        return found_marker
-
-    def _read_loop(self, ser: serial.Serial, buf: bytearray):
+        session_marker = SESSION_MARKER_BYTES
+        shutdown_cmd = SHUTDOWN_COMMAND_BYTES
+        ready_msg = READY_MESSAGE_BYTES
+
+        next_send = 0.0
+        while not self.stop_evt.is_set():
+            now = time.monotonic()
+            if now >= next_send:
+                ser.write(ready_msg)
+                next_send = now + HANDSHAKE_SEND_INTERVAL
+            n = self._read_chunk(ser)
+
+            if not n:
+                continue
+
+            data, parts = self._split_lines(n)
+            # Pre-handshake output is discarded, so lines are only looked at
+            # when the chunk contains the marker or the shutdown command
+            if session_marker not in data and shutdown_cmd not in data:
+                continue
+            for i, raw in enumerate(parts):
+                if session_marker in raw:
+                    # The marker line still goes through the queue: the
+                    # recorder starts a new session file on it
+                    marker_line = MarkerLine(raw)
+                    self.session_marker_line = marker_line
+                    self.out_q.put([marker_line])
+                    # Hand the rest of the chunk over to the read loop
+                    rest = parts[i + 1 :]
+                    if rest:
+                        rest.append(bytes(self._view[: self._pending]))
+                        self._keep_pending(b"\n".join(rest))
+                    self.ready_event.set()
+                    return True
+
+                # If the Pico requests a shutdown during handshake
+                if shutdown_cmd in raw:
+                    try:
+                        self._handle_shutdown(ser)
+                    except Exception as e:
+                        print(f"Shutdown handling error: {e}", flush=True)
+                    return False
+
+        return False
+
+    def _read_loop(self, ser: serial.Serial):
         """
         Main reading loop after handshake.
 
         Args:
             ser: Open serial connection
-            buf: Buffer for accumulating data
         """
-        while not self.stop_evt.is_set():
+        # Lines left over from the handshake chunk are processed first
+        if self._buf.find(b"\n", 0, self._pending) >= 0:
+            if not self._process_chunk(ser, 0):
+                return
+
+        # Hot loop: bind everything it calls to locals once
+        stopped = self.stop_evt.is_set
+        upload_requested = self.upload_event.is_set
+        read_chunk = self._read_chunk
+        process_chunk = self._process_chunk
+
+        while not stopped():
             # If an upload was requested, handle it (will close the serial port)
-            if self.upload_event.is_set():
+            if upload_requested():
                 try:
                     # Handle upload while we have an open serial object
                     self._handle_upload(ser)
@@ -168,35 +276,237 @@ class SerialReaderThread(threading.Thread):
                 # the run() loop can reconnect and re-handshake after reboot.
                 break
             try:
-                chunk = ser.read(SERIAL_READ_CHUNK_SIZE)
+                # One large read per SERIAL_TIMEOUT window; lines are split in
+                # _process_chunk (pyserial's read_until() reads byte by byte).
+                # Sleeps until data arrives or stop()/an upload request wakes it.
+                n = read_chunk(ser, wait_idle=True)
             except serial.SerialException as e:
                 print(f"Read error: {e}", flush=True)
                 break
 
-            if not chunk:
+            if not n:
                 continue
 
-            buf.extend(chunk)
-            # Process all complete lines in buffer
-            while True:
-                nl = buf.find(b"\n")
-                if nl == -1:
+            if not process_chunk(ser, n):
+                # Shutdown requested; return so outer context closes serial
+                # and run() can exit
+                return
+
+    def _read_chunk(self, ser: serial.Serial, wait_idle: bool = False) -> int:
+        """
+        Read up to SERIAL_READ_CHUNK_SIZE bytes into the line buffer.
+
+        Data lands directly after the pending partial line, so no bytes object
+        is allocated per read and nothing is copied into the buffer afterwards.
+
+        Args:
+            ser: Open serial connection
+            wait_idle: With direct fd reads, wait without a timeout until the
+                first byte arrives or the thread is woken (stop or upload)
+
+        Returns:
+            Number of bytes read (0 on timeout or wake-up)
+        """
+        start = self._pending
+        end = start + SERIAL_READ_CHUNK_SIZE
+        if end > len(self._buf):
+            self._grow_buffer(end)
+        view = self._view[start:end]
+        if self._fd is None:
+            return ser.readinto(view)
+        return self._readinto_fd(view, ser.timeout, wait_idle)
+
+    def _connect_fd(self, ser: serial.Serial):
+        """Set up direct fd reads for a newly opened port (Linux only)."""
+        self._fd = getattr(ser, "fd", None) if _HAS_READV else None
+        self._poller = None
+        if self._fd is not None:
+            self._poller = select.poll()
+            self._poller.register(self._fd, select.POLLIN)
+            self._poller.register(self._wake_r, select.POLLIN)
+
+    def _readinto_fd(self, view: memoryview, timeout: float, wait_idle: bool) -> int:
+        """
+        Fill `view` from the Linux port fd with pyserial's read() semantics.
+
+        pyserial's read() collects data in a bytearray and copies it into a
+        new bytes object; this reads into the caller's buffer with
+        os.readv() instead. Readiness is waited for with a poll object
+        registered once per connection (select.select() rebuilds its fd
+        sets on every call). Returns when `view` is full or `timeout`
+        expires. With `wait_idle` the timeout only starts with the first
+        byte, so an idle port costs no wake-ups at all; a byte on the wake
+        pipe (see _wake()) makes it return early so the caller re-checks
+        its flags.
+
+        Raises:
+            serial.SerialException: On read errors or a disconnected device
+        """
+        fd = self._fd
+        wake_r = self._wake_r
+        poll = self._poller.poll
+        readv = os.readv
+        monotonic = time.monotonic
+        size = len(view)
+        n = 0
+        deadline = monotonic() + timeout
+        remaining = None if wait_idle else timeout
+        while True:
+            events = poll(None if remaining is None else remaining * 1000)
+            if not events:
+                break  # timeout
+            if any(ev_fd == wake_r for ev_fd, _ in events):
+                self._drain_wake_pipe()
+                break
+            try:
+                got = readv(fd, [view[n:]])
+            except OSError as e:
+                if e.errno not in _RETRY_ERRNOS:
+                    raise serial.SerialException(f"read failed: {e}")
+            else:
+                if not got:
+                    # Disconnected devices are always readable but return nothing
+                    raise serial.SerialException(
+                        "device reports readiness to read but returned no data "
+                        "(device disconnected or multiple access on port?)"
+                    )
+                if not n and remaining is None:
+                    deadline = monotonic() + timeout
+                n += got
+                if n >= size:
                     break
-                raw = buf[:nl]
-                del buf[: nl + 1]
-                if raw.endswith(b"\r"):
-                    raw = raw[:-1]
-                text = raw.decode("utf-8", errors="replace")
-                # Detect shutdown command mid-run
-                if SHUTDOWN_COMMAND in text:
-                    try:
-                        self._handle_shutdown(ser)
-                    except Exception as e:
-                        print(f"Shutdown handling error: {e}", flush=True)
-                    # Return so outer context closes serial and run() can exit
-                    return
+            if not n and wait_idle:
+                continue
+            remaining = deadline - monotonic()
+            if remaining <= 0:
+                break
+        return n
 
-                self.out_q.put(text)
+    def _split_lines(self, n: int, _split=bytes.split):
+        """
+        Split the pending partial line plus `n` newly read bytes into lines.
+
+        The new bytes were read into the line buffer right after the pending
+        ones. Only the new bytes are searched for a newline: if there is none
+        the pending count is just advanced, so a long line arriving in many
+        small reads is neither copied nor rescanned each time. Otherwise the
+        complete input is taken out with a single copy and the buffer is
+        compacted once (the trailing partial line moves to the front).
+        CRLF endings are normalised with one bytes.replace() before the
+        split, so no per-line "\r" stripping is needed afterwards.
+
+        Args:
+            n: Number of bytes read into the buffer after the pending bytes
+                (0 splits the pending bytes themselves, e.g. the lines left
+                over from the handshake chunk)
+
+        Returns:
+            (data, parts): the bytes that were split and the complete lines
+        """
+        end = self._pending + n
+        start = self._pending if n else 0
+        if self._buf.find(b"\n", start, end) < 0:
+            self._pending = end
+            return b"", []
+        data = bytes(self._view[:end])
+        if b"\r\n" in data:
+            data = data.replace(b"\r\n", b"\n")
+        parts = _split(data, b"\n")
+        self._keep_pending(parts.pop())
+        return data, parts
+
+    def _keep_pending(self, data: bytes):
+        """Store `data` as the pending partial input at the start of the line buffer."""
+        n = len(data)
+        if n > len(self._buf):
+            self._grow_buffer(n)
+        self._buf[:n] = data
+        self._pending = n
+
+    def _grow_buffer(self, size: int):
+        """Enlarge the line buffer to at least `size` bytes, keeping pending bytes."""
+        buf = bytearray(max(size, 2 * len(self._buf)))
+        buf[: self._pending] = self._view[: self._pending]
+        self._buf = buf
+        self._view = memoryview(buf)
+
+    def _process_chunk(self, ser: serial.Serial, n: int) -> bool:
+        """
+        Split newly read bytes (plus the carried tail) into lines and queue them.
+
+        A single bytes.split() handles every complete line in the chunk; only
+        the trailing partial line is carried over to the next read. All lines
+        of the chunk are handed to the queue with one put(). Lines stay raw
+        bytes; decoding (if any) is left to consumers.
+
+        Args:
+            ser: Open serial connection (needed for shutdown handling)
+            n: Number of bytes just read into the line buffer
+
+        Returns:
+            False if a shutdown command was received, True otherwise
+        """
+        data, parts = self._split_lines(n)
+        # Marker and command searches run once over the whole chunk in C;
+        # lines are only checked individually when the chunk contains one.
+        marker_b = self.marker_b
+        has_marker = marker_b is not None and marker_b in data
+        has_shutdown = SHUTDOWN_COMMAND_BYTES in data
+        if not (has_marker or has_shutdown):
+            # Common case: the split result is the batch, no per-line work
+            if parts:
+                self.out_q.put(parts)
+            return True
+
+        lines = []
+        append = lines.append
+        for raw in parts:
+            # Detect shutdown command mid-run
+            if has_shutdown and SHUTDOWN_COMMAND_BYTES in raw:
+                # Lines received before the command are still recorded
+                self.out_q.put(lines)
+                try:
+                    self._handle_shutdown(ser)
+                except Exception as e:
+                    print(f"Shutdown handling error: {e}", flush=True)
+                return False
+
+            if has_marker and marker_b in raw:
+                raw = MarkerLine(raw)
+            append(raw)
+        self.out_q.put(lines)
+        return True
+
+    def stop(self):
+        """Ask the thread to stop and wake it if it is waiting for data."""
+        self.stop_evt.set()
+        self._wake()
+
+    def _wake(self):
+        """Interrupt an idle wait in _readinto_fd() (no-op without direct fd reads)."""
+        with self._wake_lock:
+            if self._wake_w is None:
+                return
+            try:
+                os.write(self._wake_w, b"\0")
+            except BlockingIOError:
+                pass  # pipe already full: a wake-up is pending anyway
+
+    def _close_wake_pipe(self):
+        """Close the self-pipe; later _wake() calls do nothing."""
+        with self._wake_lock:
+            for fd in (self._wake_r, self._wake_w):
+                if fd is not None:
+                    os.close(fd)
+            self._wake_r = self._wake_w = None
+
+    def _drain_wake_pipe(self):
+        """Consume pending wake-up bytes."""
+        try:
+            while os.read(self._wake_r, 64):
+                pass
+        except BlockingIOError:
+            pass
 
     # Public API: request firmware upload. os_name can be passed (e.g., 'Windows').
     def request_firmware_upload(self, os_name: str = None):
@@ -206,13 +516,14 @@ class SerialReaderThread(threading.Thread):
         and trigger the upload procedure using the currently-open serial port.
         """
         with self.upload_lock:
-            self.upload_os_name = os_name or platform.system()
+            self.upload_os_name = os_name or _PLATFORM
             # Ensure upload folder exists
             try:
                 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
             except Exception:
                 pass
             self.upload_event.set()
+        self._wake()
 
     def _handle_upload(self, ser: serial.Serial):
         """Perform the upload sequence using the currently-open serial object.
@@ -228,7 +539,7 @@ class SerialReaderThread(threading.Thread):
         port = getattr(ser, "port", None)
         print("Upload requested, sending UPLOAD command to Pico...", flush=True)
         try:
-            ser.write((UPLOAD_COMMAND + "\n").encode("utf-8"))
+            ser.write(UPLOAD_COMMAND_BYTES)
             ser.flush()
         except Exception as e:
             print(f"Failed to send upload command: {e}", flush=True)
@@ -267,33 +578,43 @@ class SerialReaderThread(threading.Thread):
             self.upload_event.clear()
             return
 
-        for uf2 in uf2_files:
-            name = os.path.basename(uf2)
-            dest = os.path.join(mount_point, name)
-            success = False
-            for attempt in range(UF2_COPY_RETRY):
-                try:
-                    print(
-                        f"Copying {uf2} to {mount_point} (attempt {attempt + 1})...",
-                        flush=True,
-                    )
-                    shutil.copy(uf2, mount_point)
-                    success = True
-                    break
-                except Exception as e:
-                    print(f"Copy attempt failed: {e}", flush=True)
-                    time.sleep(UF2_COPY_WAIT)
-
-            if success:
-                print(f"Copied {name} to {mount_point}", flush=True)
-            else:
-                print(f"Failed to copy {name}", flush=True)
+        # Copies run concurrently so one file's open/read overlaps another's
+        # write/close on the drive; results are reported in file order
+        with ThreadPoolExecutor(max_workers=UF2_COPY_WORKERS) as pool:
+            futures = [
+                pool.submit(self._copy_uf2, uf2, mount_point) for uf2 in uf2_files
+            ]
+            for uf2, future in zip(uf2_files, futures):
+                name = os.path.basename(uf2)
+                if future.result():
+                    print(f"Copied {name} to {mount_point}", flush=True)
+                else:
+                    print(f"Failed to copy {name}", flush=True)
 
         # After copying, the Pico will reboot into the new firmware. Clear upload flag
         # and allow the outer loop to reconnect and perform handshake again.
         print("Upload sequence finished; waiting for Pico to reboot...", flush=True)
         self.upload_event.clear()
 
+    @staticmethod
+    def _copy_uf2(uf2: str, mount_point: str) -> bool:
+        """Copy one UF2 file to the drive, retrying UF2_COPY_RETRY times.
+
+        Returns True if the copy succeeded.
+        """
+        for attempt in range(UF2_COPY_RETRY):
+            try:
+                print(
+                    f"Copying {uf2} to {mount_point} (attempt {attempt + 1})...",
+                    flush=True,
+                )
+                copy_file(uf2, mount_point)
+                return True
+            except Exception as e:
+                print(f"Copy attempt failed: {e}", flush=True)
+                time.sleep(UF2_COPY_WAIT)
+        return False
+
     def _handle_shutdown(self, ser: serial.Serial):
         """Close serial and attempt to shut down the host using sudo poweroff on Linux.
 
@@ -327,7 +648,7 @@ class SerialReaderThread(threading.Thread):
 
         # Perform platform-appropriate shutdown using the sudo + os.system approach on Linux
         try:
-            system = platform.system()
+            system = _PLATFORM
             if system == "Linux":
                 # Use os.system to run the sudo poweroff command (will require sudoers/NOPASSWD for non-root)
                 print("Executing: sudo poweroff", flush=True)
@@ -345,118 +666,172 @@ class SerialReaderThread(threading.Thread):
     def _wait_for_uf2_drive(self, timeout: float = 20.0):
         """Wait up to `timeout` seconds for a drive with the Pico label to appear.
 
+        Sleeps on drive events (see DriveWatcher) and only re-scans drives when
+        woken by one, or every UF2_POLL_INTERVAL where events do not cover
+        every kind of drive arrival.
+
         Returns the mountpoint (string) or None if not found.
         """
-        deadline = time.time() + timeout
-        while time.time() < deadline and not self.stop_evt.is_set():
-            mount = self._find_pico_drive()
-            if mount:
-                return mount
-            time.sleep(0.5)
+        deadline = time.monotonic() + timeout
+        with DriveWatcher() as watcher:
+            changed = True
+            while not self.stop_evt.is_set():
+                if changed or not watcher.event_driven:
+                    mount = self._find_pico_drive()
+                    if mount:
+                        return mount
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                changed = watcher.wait(remaining)
         return None
 
-    def _find_pico_drive(self):
-        """Try to find the Pico UF2 drive by label or heuristics across platforms.
+    def _find_pico_drive_linux(self):
+        """Linux: find the Pico UF2 drive among mounts, else mount it by label.
 
         Returns mountpoint string or None.
         """
-        label = PICO_DRIVE_LABEL
-        system = platform.system()
+        # 1) Check already-mounted partitions first
+        mount = self._find_mounted_drive_linux()
+        if mount:
+            return mount
 
-        # 1) Check already-mounted partitions first (Windows or Unix)
-        for part in psutil.disk_partitions(all=False):
+        # 2) Fallback: detect unmounted block device by label and attempt to mount it
+        try:
+            device_path = find_unmounted_device(PICO_DRIVE_LABEL)
+            if device_path:
+                mount_point = f"/mnt/{PICO_DRIVE_LABEL}"
+                try:
+                    os.makedirs(mount_point, exist_ok=True)
+                except Exception:
+                    pass
+
+                try:
+                    # Try to mount; failure is non-fatal (we still return mount_point)
+                    subprocess.run(
+                        [
+                            "sudo",
+                            "mount",
+                            "-o",
+                            "uid=1000,gid=1000",
+                            device_path,
+                            mount_point,
+                        ],
+                        check=False,
+                    )
+                except Exception as e:
+                    print(
+                        f"Linux mount fallback error during mount: {e}",
+                        flush=True,
+                    )
+
+                return mount_point
+        except Exception as e:
+            print(f"Linux mount fallback error: {e}", flush=True)
+
+        return None
+
+    def _find_pico_drive_windows(self):
+        """Windows: find the Pico UF2 drive by volume label or heuristics.
+
+        Returns mountpoint string or None.
+        """
+        label = _PICO_LABEL_LOWER
+        partitions = psutil.disk_partitions(all=False)
+
+        # Forget drives that went away so a reused drive letter is re-queried
+        known = self._known_devices
+        present = {part.device for part in partitions}
+        for device in [d for d in known if d not in present]:
+            del known[device]
+
+        for part in partitions:
             try:
-                # Windows: try to read the volume label via WinAPI
-                if system == "Windows":
-                    try:
-                        volume_name_buf = ctypes.create_unicode_buffer(1024)
-                        fs_name_buf = ctypes.create_unicode_buffer(1024)
-                        serial_number = ctypes.c_ulong()
-                        max_component_length = ctypes.c_ulong()
-                        file_system_flags = ctypes.c_ulong()
-                        rc = ctypes.windll.kernel32.GetVolumeInformationW(
-                            ctypes.c_wchar_p(part.device),
-                            volume_name_buf,
-                            ctypes.sizeof(volume_name_buf),
-                            ctypes.byref(serial_number),
-                            ctypes.byref(max_component_length),
-                            ctypes.byref(file_system_flags),
-                            fs_name_buf,
-                            ctypes.sizeof(fs_name_buf),
-                        )
-                        if rc and volume_name_buf.value:
-                            if label.lower() in volume_name_buf.value.lower():
-                                return part.mountpoint
-                    except Exception:
-                        # fall through to heuristics
-                        pass
-
-                # Generic heuristics (device name or mountpoint contains label)
-                if label.lower() in (part.device or "").lower():
-                    return part.mountpoint
-                if label.lower() in (part.mountpoint or "").lower():
+                # Read the volume label via WinAPI (once per drive)
+                volume_label = known.get(part.device)
+                if volume_label is None:
+                    volume_label = get_volume_label(part.device)
+                    if volume_label is not None:
+                        volume_label = volume_label.lower()
+                        known[part.device] = volume_label
+                if volume_label and label in volume_label:
                     return part.mountpoint
 
-                # On many Linux systems the UF2 drive appears under /media or /run/media
-                if part.mountpoint and (
-                    "/media" in part.mountpoint or "/run/media" in part.mountpoint
-                ):
-                    if part.fstype and part.fstype.lower().startswith("fat"):
-                        return part.mountpoint
+                if self._partition_matches(part):
+                    return part.mountpoint
             except Exception:
                 continue
 
-        # 2) Linux fallback: detect unmounted block device by label and attempt to mount it
-        if system == "Linux":
+        return None
+
+    def _find_pico_drive_generic(self):
+        """Other platforms: find the Pico UF2 drive among psutil partitions.
+
+        Returns mountpoint string or None.
+        """
+        for part in psutil.disk_partitions(all=False):
             try:
-                import subprocess
+                if self._partition_matches(part):
+                    return part.mountpoint
+            except Exception:
+                continue
+        return None
 
-                result = subprocess.run(
-                    ["lsblk", "-o", "NAME,LABEL,MOUNTPOINT", "-P"],
-                    capture_output=True,
-                    text=True,
-                    check=True,
-                )
-                for line in result.stdout.splitlines():
-                    # Parse KEY="value" pairs produced by lsblk -P
-                    fields = dict(kv.split("=", 1) for kv in line.split() if "=" in kv)
-                    label_field = fields.get("LABEL", "").strip('"')
-                    mount_field = fields.get("MOUNTPOINT", "").strip('"')
-                    name_field = fields.get("NAME", "").strip('"')
-
-                    if (
-                        label_field
-                        and label_field.lower() == label.lower()
-                        and not mount_field
-                    ):
-                        device_path = f"/dev/{name_field}"
-                        mount_point = f"/mnt/{label_field}"
-                        try:
-                            os.makedirs(mount_point, exist_ok=True)
-                        except Exception:
-                            pass
-
-                        try:
-                            # Try to mount; failure is non-fatal (we still return mount_point)
-                            subprocess.run(
-                                [
-                                    "sudo",
-                                    "mount",
-                                    "-o",
-                                    "uid=1000,gid=1000",
-                                    device_path,
-                                    mount_point,
-                                ],
-                                check=False,
-                            )
-                        except Exception as e:
-                            print(
-                                f"Linux mount fallback error during mount: {e}",
-                                flush=True,
-                            )
-
-                        return mount_point
-            except Exception as e:
-                print(f"Linux mount fallback error: {e}", flush=True)
+    # Selected once at import; no platform checks while polling for the drive
+    if _PLATFORM == "Linux":
+        _find_pico_drive = _find_pico_drive_linux
+    elif _IS_WINDOWS:
+        _find_pico_drive = _find_pico_drive_windows
+    else:
+        _find_pico_drive = _find_pico_drive_generic
+
+    @staticmethod
+    def _partition_matches(part) -> bool:
+        """Label/mountpoint heuristics for a psutil partition entry."""
+        label = _PICO_LABEL_LOWER
+        # Device name or mountpoint contains label
+        if label in (part.device or "").lower():
+            return True
+        if label in (part.mountpoint or "").lower():
+            return True
+
+        # On many systems the UF2 drive appears under /media or /run/media
+        if part.mountpoint and (
+            "/media" in part.mountpoint or "/run/media" in part.mountpoint
+        ):
+            if part.fstype and part.fstype.lower().startswith("fat"):
+                return True
+        return False
+
+    @staticmethod
+    def _find_mounted_drive_linux():
+        """Check mounted partitions by parsing /proc/mounts directly.
+
+        Same heuristics as the psutil path, but compared on raw bytes without
+        building a namedtuple per mount on every poll.
 
+        Returns mountpoint string or None.
+        """
+        try:
+            with open("/proc/mounts", "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+
+        label = _PICO_LABEL_LOWER_B
+        for line in data.split(b"\n"):
+            fields = line.split(b" ", 3)
+            # Only block devices, like psutil.disk_partitions(all=False)
+            if len(fields) < 3 or not fields[0].startswith(b"/dev/"):
+                continue
+            device, mountpoint, fstype = fields[0], fields[1], fields[2]
+            if (
+                label in device.lower()
+                or label in mountpoint.lower()
+                or (
+                    (b"/media" in mountpoint or b"/run/media" in mountpoint)
+                    and fstype.lower().startswith(b"fat")
+                )
+            ):
+                return _decode_mount_path(mountpoint)
         return None
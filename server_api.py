@@ -3,16 +3,32 @@ Server API communication module.
 Handles file uploads, heartbeat, and status reporting.
 """
 
+import gzip
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from config import (
+    SERVER_TIMEOUT,
+    SERVER_RETRIES,
+    SERVER_BACKOFF_FACTOR,
+    UPLOAD_GZIP_LEVEL,
+)
+
 
 class ServerAPI:
     """
     Handles all server communication.
 
+    Features:
+    - Log buffer upload (gzip-compressed POST)
+    - One pooled keep-alive HTTP session for all requests
+    - Retry logic with exponential backoff (urllib3 Retry)
+
     Future functionality:
-    - Upload log files/buffers to server
     - Send heartbeat signals
     - Report device status
-    - Retry logic with exponential backoff
     """
 
     def __init__(self, server_url: str):
@@ -22,25 +38,53 @@ class ServerAPI:
         Args:
             server_url: Base URL of the server (e.g., 'https://server.com/api')
         """
-        self.server_url = server_url
+        self.server_url = server_url.rstrip("/")
 
-    def upload_log_buffer(self, buffer_data: str, metadata: dict) -> bool:
+        # Keep-alive session: repeated uploads reuse the TCP/TLS connection
+        retry = Retry(
+            total=SERVER_RETRIES,
+            backoff_factor=SERVER_BACKOFF_FACTOR,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=None,  # uploads are POSTs; retry them too
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=2, max_retries=retry)
+        self._session = requests.Session()
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
+    def upload_log_buffer(self, buffer_data: bytes, metadata: dict) -> bool:
         """
         Upload log buffer to server.
 
         Args:
-            buffer_data: Log content to upload
+            buffer_data: Raw log bytes as received from the Pico (not decoded)
             metadata: Dict with session_id, start_time, end_time, etc.
 
         Returns:
             True if upload successful, False otherwise
         """
-        # TODO: Implement upload logic
-        # - Compress data (gzip)
-        # - POST to /logs/upload endpoint
-        # - Handle retries with exponential backoff
-        # - Return success/failure
-        pass
+        # Log text is repetitive: the fastest gzip level already shrinks it
+        # several times over while keeping CPU use low on the Pi Zero
+        payload = gzip.compress(buffer_data, compresslevel=UPLOAD_GZIP_LEVEL)
+        try:
+            response = self._session.post(
+                f"{self.server_url}/logs/upload",
+                data=payload,
+                params=metadata,
+                headers={
+                    "Content-Encoding": "gzip",
+                    "Content-Type": "application/octet-stream",
+                },
+                timeout=SERVER_TIMEOUT,
+            )
+        except requests.RequestException as e:
+            print(f"Log upload failed: {e}", flush=True)
+            return False
+
+        if not response.ok:
+            print(f"Log upload rejected: HTTP {response.status_code}", flush=True)
+            return False
+        return True
 
     def send_heartbeat(self, device_status: dict) -> bool:
         """
@@ -70,3 +114,7 @@ class ServerAPI:
         # TODO: Implement status reporting
         # - POST to /device/status endpoint
         pass
+
+    def close(self):
+        """Close pooled connections."""
+        self._session.close()
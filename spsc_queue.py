@@ -0,0 +1,122 @@
+"""
+Single-producer / single-consumer hand-off of line batches between threads.
+"""
+
+import threading
+
+from config import QUEUE_MAX_SIZE
+
+
+class SPSCQueue:
+    """
+    Batch queue for exactly one producer thread and one consumer thread.
+
+    queue.Queue takes a lock and notifies a condition on every put() and
+    get(). Here batches (one list per serial read) go into a fixed ring of
+    slots with power-of-two capacity. Only the producer moves the tail and
+    only the consumer moves the head; each is a single attribute store,
+    which is atomic under the GIL, so no lock is needed. A single Event
+    wakes the consumer, which takes everything queued in one call.
+
+    Features:
+    - put() hands over a whole list of items in one call
+    - get_all() returns every queued item, waiting up to `timeout` if empty
+    - Bounded: when the ring is full, the new batch is dropped (the head
+      belongs to the consumer, so the producer never discards old batches),
+      or with block=True put() waits until the consumer frees a slot
+    """
+
+    def __init__(self, maxsize: int = QUEUE_MAX_SIZE, block: bool = False):
+        """
+        Initialize queue.
+
+        Args:
+            maxsize: Maximum number of queued batches, rounded up to a power
+                of two. When full, new batches are dropped and their items
+                counted in `dropped`.
+            block: Make put() wait for a free slot instead of dropping, for
+                queues whose batches must not be lost
+        """
+        capacity = 1
+        while capacity < maxsize:
+            capacity <<= 1
+        self.maxsize = capacity
+        self._mask = capacity - 1
+        self._slots = [None] * capacity
+        self._head = 0  # next slot to read (consumer only)
+        self._tail = 0  # next slot to write (producer only)
+        self._evt = threading.Event()
+        self.block = block
+        # Set by the consumer after freeing slots (blocking mode only)
+        self._space = threading.Event()
+        self.dropped = 0
+
+    def put(self, items: list):
+        """Queue a batch of items (producer side)."""
+        if not items:
+            return
+        tail = self._tail
+        if tail - self._head > self._mask:
+            if not self.block:
+                self.dropped += len(items)
+                return
+            self._wait_for_space(tail)
+        self._slots[tail & self._mask] = items
+        # Publish only after the slot is filled
+        self._tail = tail + 1
+        # Event.set() takes the condition lock and notifies; skip it while the
+        # consumer has not yet cleared the previous wake-up. get_all() clears
+        # before reading the tail, so a batch published here is still seen.
+        if not self._evt.is_set():
+            self._evt.set()
+
+    def get_all(self, timeout: float = None) -> list:
+        """
+        Take every queued item (consumer side).
+
+        Args:
+            timeout: Seconds to wait for a batch if the queue is empty
+
+        Returns:
+            List of items in arrival order (empty if the wait timed out)
+        """
+        if self._head == self._tail:
+            self._evt.wait(timeout)
+        # Clear before reading the tail so a put() racing with the drain re-arms the event
+        self._evt.clear()
+
+        head = self._head
+        tail = self._tail
+        if head == tail:
+            return []
+        slots = self._slots
+        mask = self._mask
+        if tail - head == 1:
+            i = head & mask
+            items = slots[i]
+            slots[i] = None
+        else:
+            items = []
+            extend = items.extend
+            for pos in range(head, tail):
+                i = pos & mask
+                extend(slots[i])
+                slots[i] = None
+        # Free the slots only after they have been read
+        self._head = tail
+        if self.block:
+            self._space.set()
+        return items
+
+    def _wait_for_space(self, tail: int):
+        """Block the producer until the slot at `tail` is free."""
+        while tail - self._head > self._mask:
+            # Clear, then re-check: a get_all() that freed slots in between
+            # is seen here, and one that frees them later sets the event
+            self._space.clear()
+            if tail - self._head > self._mask:
+                self._space.wait()
+
+    def empty(self) -> bool:
+        """Return True if no batch is queued."""
+        return self._head == self._tail
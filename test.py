@@ -2,35 +2,13 @@ import argparse
 import serial
 import time
 import os
-import shutil
 import glob
 import psutil
 import platform
-import ctypes
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 
-
-def get_volume_label_windows(drive_letter):
-    """Return the volume label for a given Windows drive letter (e.g., 'E:\\')."""
-    volume_name_buf = ctypes.create_unicode_buffer(1024)
-    fs_name_buf = ctypes.create_unicode_buffer(1024)
-    serial_number = ctypes.c_ulong()
-    max_component_length = ctypes.c_ulong()
-    file_system_flags = ctypes.c_ulong()
-
-    rc = ctypes.windll.kernel32.GetVolumeInformationW(
-        ctypes.c_wchar_p(drive_letter),
-        volume_name_buf,
-        ctypes.sizeof(volume_name_buf),
-        ctypes.byref(serial_number),
-        ctypes.byref(max_component_length),
-        ctypes.byref(file_system_flags),
-        fs_name_buf,
-        ctypes.sizeof(fs_name_buf),
-    )
-    if rc:
-        return volume_name_buf.value
-    return None
+from utils import copy_file, find_unmounted_device, get_volume_label
 
 
 def find_pico_drive(label="RPI-RP2", timeout=20.0):
@@ -48,31 +26,8 @@ def find_pico_drive(label="RPI-RP2", timeout=20.0):
             try:
                 # Windows: match by volume label
                 if system == "Windows":
-                    from ctypes import (
-                        create_unicode_buffer,
-                        c_ulong,
-                        byref,
-                        windll,
-                        c_wchar_p,
-                        sizeof,
-                    )
-
-                    volume_name_buf = create_unicode_buffer(1024)
-                    fs_name_buf = create_unicode_buffer(1024)
-                    serial_number = c_ulong()
-                    max_component_length = c_ulong()
-                    file_system_flags = c_ulong()
-                    rc = windll.kernel32.GetVolumeInformationW(
-                        c_wchar_p(part.device),
-                        volume_name_buf,
-                        sizeof(volume_name_buf),
-                        byref(serial_number),
-                        byref(max_component_length),
-                        byref(file_system_flags),
-                        fs_name_buf,
-                        sizeof(fs_name_buf),
-                    )
-                    if rc and label.lower() in volume_name_buf.value.lower():
+                    volume_label = get_volume_label(part.device)
+                    if volume_label and label.lower() in volume_label.lower():
                         return part.mountpoint
                 else:
                     # Linux / macOS: match by mount path name
@@ -85,35 +40,23 @@ def find_pico_drive(label="RPI-RP2", timeout=20.0):
         # --- Step 2: Linux fallback: detect unmounted block device ---
         if system == "Linux":
             try:
-                result = subprocess.run(
-                    ["lsblk", "-o", "NAME,LABEL,MOUNTPOINT", "-P"],
-                    capture_output=True,
-                    text=True,
-                    check=True,
-                )
-                for line in result.stdout.splitlines():
-                    fields = dict(kv.split("=", 1) for kv in line.split() if "=" in kv)
-                    label_field = fields.get("LABEL", "").strip('"')
-                    mount_field = fields.get("MOUNTPOINT", "").strip('"')
-                    name_field = fields.get("NAME", "").strip('"')
-
-                    if label_field.lower() == label.lower() and not mount_field:
-                        device_path = f"/dev/{name_field}"
-                        mount_point = f"/mnt/{label_field}"
-                        os.makedirs(mount_point, exist_ok=True)
-                        print(f"Mounting {device_path} -> {mount_point}")
-                        subprocess.run(
-                            [
-                                "sudo",
-                                "mount",
-                                "-o",
-                                "uid=1000,gid=1000",
-                                device_path,
-                                mount_point,
-                            ],
-                            check=False,
-                        )
-                        return mount_point
+                device_path = find_unmounted_device(label)
+                if device_path:
+                    mount_point = f"/mnt/{label}"
+                    os.makedirs(mount_point, exist_ok=True)
+                    print(f"Mounting {device_path} -> {mount_point}")
+                    subprocess.run(
+                        [
+                            "sudo",
+                            "mount",
+                            "-o",
+                            "uid=1000,gid=1000",
+                            device_path,
+                            mount_point,
+                        ],
+                        check=False,
+                    )
+                    return mount_point
             except Exception as e:
                 print("Linux mount fallback error:", e)
 
@@ -128,14 +71,19 @@ def find_uf2_and_copy(upload_dir, mount_point, pattern="*.uf2"):
         print(f"No UF2 files found in {upload_dir}")
         return False
 
-    for uf2 in files:
-        try:
+    # Overlap the copies; report them in file order
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        futures = []
+        for uf2 in files:
             print(f"Copying {uf2} -> {mount_point}")
-            shutil.copy(uf2, mount_point)
-            print("Copied", uf2)
-        except Exception as e:
-            print("Copy failed:", e)
-            return False
+            futures.append(pool.submit(copy_file, uf2, mount_point))
+        for uf2, future in zip(files, futures):
+            try:
+                future.result()
+                print("Copied", uf2)
+            except Exception as e:
+                print("Copy failed:", e)
+                return False
 
     return True
 
@@ -216,7 +164,7 @@ def main():
             return
         print("Copying", uf2_path, "->", mount_point)
         try:
-            shutil.copy(uf2_path, mount_point)
+            copy_file(uf2_path, mount_point)
             print("Copy successful")
         except Exception as e:
             print("Copy failed:", e)
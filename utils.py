@@ -2,16 +2,358 @@
 Utility functions for the Pico Log Recorder system.
 """
 
+import logging
+import os
+import re
+import sys
 import time
-from typing import Optional
-import serial.tools.list_ports
+import shutil
+import subprocess
+from typing import NamedTuple, Optional
 
-from config import TIMESTAMP_FORMAT
+from config import TIMESTAMP_FORMAT, PORT_CACHE_TTL
+
+log = logging.getLogger(__name__)
+
+if os.name == "nt":
+    import ctypes
+    from ctypes import wintypes
+
+    _kernel32 = ctypes.windll.kernel32
+
+    # Declared prototypes: ctypes converts arguments by the declared types
+    # instead of inspecting every argument on each call
+    _GetVolumeInformationW = _kernel32.GetVolumeInformationW
+    _GetVolumeInformationW.argtypes = [
+        wintypes.LPCWSTR,  # lpRootPathName
+        wintypes.LPWSTR,  # lpVolumeNameBuffer
+        wintypes.DWORD,  # nVolumeNameSize
+        wintypes.LPDWORD,  # lpVolumeSerialNumber
+        wintypes.LPDWORD,  # lpMaximumComponentLength
+        wintypes.LPDWORD,  # lpFileSystemFlags
+        wintypes.LPWSTR,  # lpFileSystemNameBuffer
+        wintypes.DWORD,  # nFileSystemNameSize
+    ]
+    _GetVolumeInformationW.restype = wintypes.BOOL
+
+    _CopyFileExW = _kernel32.CopyFileExW
+    _CopyFileExW.argtypes = [
+        wintypes.LPCWSTR,  # lpExistingFileName
+        wintypes.LPCWSTR,  # lpNewFileName
+        wintypes.LPVOID,  # lpProgressRoutine
+        wintypes.LPVOID,  # lpData
+        wintypes.LPBOOL,  # pbCancel
+        wintypes.DWORD,  # dwCopyFlags
+    ]
+    _CopyFileExW.restype = wintypes.BOOL
+
+    # Reused by every get_volume_label() call (drives are polled from one thread)
+    _VOLUME_NAME_BUF = ctypes.create_unicode_buffer(1024)
+
+
+class MarkerLine(bytes):
+    """
+    A received (raw, undecoded) line that contains the session marker.
+
+    SerialReaderThread detects the marker on raw bytes and tags such lines
+    with this type, so consumers can tell marker lines apart without
+    searching every line again.
+    """
+
+    __slots__ = ()
+
+
+# (second, formatted timestamp) of the last now_ts() call; replaced as one
+# tuple so concurrent callers never see a mismatched pair
+_TS_CACHE = (None, "")
 
 
 def now_ts() -> str:
     """Return current timestamp in DD-MM-YYYY HH:MM:SS format."""
-    return time.strftime(TIMESTAMP_FORMAT)
+    global _TS_CACHE
+    t = int(time.time())
+    sec, ts = _TS_CACHE
+    if t != sec:
+        # The format has one-second resolution: only format on a new second
+        ts = time.strftime(TIMESTAMP_FORMAT, time.localtime(t))
+        _TS_CACHE = (t, ts)
+    return ts
+
+
+def copy_file(src: str, dst: str) -> str:
+    """
+    Copy a file's contents with the platform's in-kernel copy.
+
+    Linux uses os.sendfile() and Windows uses CopyFileExW, so the data never
+    passes through a Python-level buffer. Only the contents are copied.
+    shutil.copy() also copies the permission bits, which is pointless on
+    the FAT UF2 drive (and chmod can fail there). Other platforms use
+    shutil.copyfile().
+
+    Args:
+        src: Source file path
+        dst: Destination file path or directory
+
+    Returns:
+        Path of the written file
+    """
+    if os.path.isdir(dst):
+        dst = os.path.join(dst, os.path.basename(src))
+
+    if os.name == "nt":
+        if not _CopyFileExW(src, dst, None, None, None, 0):
+            raise ctypes.WinError()
+        return dst
+
+    if not sys.platform.startswith("linux"):
+        return shutil.copyfile(src, dst)
+
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        infd, outfd = fsrc.fileno(), fdst.fileno()
+        size = os.fstat(infd).st_size
+        offset = 0
+        while offset < size:
+            sent = os.sendfile(outfd, infd, offset, size - offset)
+            if not sent:
+                break  # source shrank while copying
+            offset += sent
+    return dst
+
+
+def find_unmounted_device(label: str) -> Optional[str]:
+    """
+    Linux: find the block device carrying filesystem `label` if it is not mounted.
+
+    The device is resolved through udev's /dev/disk/by-label symlink (no
+    process spawned); `blkid -L` is only run on systems without it. The
+    mount state is then checked against /proc/self/mounts.
+
+    Args:
+        label: Exact filesystem label (e.g. 'RPI-RP2')
+
+    Returns:
+        Device path (e.g. '/dev/sda1'), or None if absent or already mounted
+    """
+    by_label = os.path.join("/dev/disk/by-label", label)
+    if os.path.exists(by_label):
+        device = os.path.realpath(by_label)
+    elif os.path.isdir("/dev/disk/by-label"):
+        return None  # udev is running and knows no such label
+    else:
+        try:
+            result = subprocess.run(
+                ["blkid", "-L", label], capture_output=True, text=True
+            )
+        except OSError:
+            return None
+        device = result.stdout.strip()
+        if not device:
+            return None
+        device = os.path.realpath(device)
+
+    try:
+        with open("/proc/self/mounts", "rb") as f:
+            mounts = f.read()
+    except OSError:
+        return device
+    device_b = os.fsencode(device)
+    for line in mounts.split(b"\n"):
+        source = line.split(b" ", 1)[0]
+        if source == device_b or (
+            source.startswith(b"/dev/") and os.path.realpath(source) == device_b
+        ):
+            return None
+    return device
+
+
+def get_volume_label(device: str) -> Optional[str]:
+    """
+    Return the label of a Windows volume (e.g. 'E:\\'), or None on failure.
+
+    Only the label is requested; the serial number, flags and file system
+    name outputs are passed as NULL. The label buffer is allocated once at
+    import and reused, so this is not meant to be called from several
+    threads at once.
+    """
+    rc = _GetVolumeInformationW(
+        device,
+        _VOLUME_NAME_BUF,
+        len(_VOLUME_NAME_BUF),
+        None,
+        None,
+        None,
+        None,
+        0,
+    )
+    if rc:
+        return _VOLUME_NAME_BUF.value
+    return None
+
+
+# Last comports() result and when it was taken (see _list_ports)
+_PORTS_CACHE = {"t": 0.0, "ports": None}
+
+# Port last returned by find_pico_port() per set of matching criteria
+_RESOLVED_PORTS = {}
+
+
+def invalidate_port_cache():
+    """Drop cached port lists and resolved ports so the next scan starts afresh."""
+    _PORTS_CACHE["ports"] = None
+    _RESOLVED_PORTS.clear()
+
+
+def _list_ports() -> list:
+    """
+    Return serial.tools.list_ports.comports() without duplicate devices,
+    reusing a result younger than PORT_CACHE_TTL.
+
+    Enumeration walks sysfs on Linux and SetupAPI on Windows; repeated
+    scans while waiting for the Pico (reconnect retries) reuse one result
+    instead of enumerating again. On Windows pyserial already asks SetupAPI
+    for present devices of the Ports and Modem classes only, so there is
+    no broader PnP/WMI listing left to narrow.
+    """
+    now = time.monotonic()
+    ports = _PORTS_CACHE["ports"]
+    if ports is None or now - _PORTS_CACHE["t"] >= PORT_CACHE_TTL:
+        # Imported on first use: the platform backend is not loaded by
+        # modules that only need the other helpers here (e.g. now_ts), nor
+        # when the port is given or found through sysfs. On Windows the
+        # SetupAPI generator is consumed directly; comports() would collect
+        # it into a list only for the filtering below to copy it again.
+        if os.name == "nt":
+            from serial.tools.list_ports_windows import iterate_comports as comports
+        else:
+            from serial.tools.list_ports import comports
+
+        # Some backends list a device more than once; keep the first entry so
+        # each port is matched once. Done here, once per enumeration.
+        seen = set()
+        ports = [
+            p
+            for p in comports()
+            if not (p.device in seen or seen.add(p.device))
+        ]
+        _PORTS_CACHE["ports"] = ports
+        _PORTS_CACHE["t"] = now
+    return ports
+
+
+# USB serial ttys on Linux: CDC-ACM (the Pico) and usb-serial drivers
+_SYS_CLASS_TTY = "/sys/class/tty"
+_USB_TTY_PREFIXES = ("ttyACM", "ttyUSB", "ttyXRUSB")
+
+
+class _UsbPort(NamedTuple):
+    """The ListPortInfo fields find_pico_port() uses, for sysfs-listed ports."""
+
+    device: str
+    vid: int
+    pid: int
+    product: Optional[str]
+    manufacturer: Optional[str]
+
+
+def _read_sysfs(path: str) -> Optional[str]:
+    """Return the first line of a sysfs attribute, or None if unreadable."""
+    try:
+        with open(path) as f:
+            return f.readline().strip()
+    except OSError:
+        return None
+
+
+def _list_usb_ports_linux(
+    vid: int, pid: Optional[int], read_strings: bool = True
+) -> Optional[list]:
+    """
+    List USB serial ports with the given IDs straight from sysfs.
+
+    comports() builds a SysFS object for every /dev/tty* candidate, resolving
+    several links and reading about six attribute files each. Here one
+    scandir() of /sys/class/tty picks the USB ttys by name, one uevent read
+    per tty yields its VID/PID (PRODUCT=vid/pid/bcd), and product and
+    manufacturer strings are only read for ports whose IDs match.
+
+    Args:
+        vid: USB Vendor ID to match
+        pid: USB Product ID to match (None to ignore)
+        read_strings: Read product/manufacturer strings (left None otherwise)
+
+    Returns:
+        List of matching ports, or None if sysfs is not available
+    """
+    try:
+        entries = list(os.scandir(_SYS_CLASS_TTY))
+    except OSError:
+        return None
+
+    ports = []
+    for entry in entries:
+        name = entry.name
+        if not name.startswith(_USB_TTY_PREFIXES):
+            continue
+        # cdc_acm ttys hang off the USB interface itself; usb-serial ttys
+        # have a port device in between
+        base = f"{_SYS_CLASS_TTY}/{name}/device"
+        product_id = None
+        for iface in (base, base + "/.."):
+            try:
+                with open(iface + "/uevent") as f:
+                    uevent = f.read()
+            except OSError:
+                break
+            _, found, rest = uevent.partition("\nPRODUCT=")
+            if found:
+                product_id = rest.partition("\n")[0]
+                break
+        if product_id is None:
+            continue
+        try:
+            p_vid, p_pid, _ = product_id.split("/")
+            p_vid = int(p_vid, 16)
+            p_pid = int(p_pid, 16)
+        except ValueError:
+            continue
+        if p_vid != vid or (pid is not None and p_pid != pid):
+            continue
+        product = manufacturer = None
+        if read_strings:
+            usb_dev = iface + "/.."
+            product = _read_sysfs(usb_dev + "/product")
+            manufacturer = _read_sysfs(usb_dev + "/manufacturer")
+        ports.append(_UsbPort("/dev/" + name, p_vid, p_pid, product, manufacturer))
+    return ports
+
+
+# Rank of Windows ports that are not COM<n>, after every COM port
+_NON_COM_RANK = 1 << 16
+_COM_RE = re.compile(r"COM(\d+)", re.IGNORECASE)
+_PREFERRED_TTY_PREFIXES = ("/dev/ttyACM", "/dev/ttyUSB")
+
+
+def _port_rank(dev: str, windows: bool) -> int:
+    """
+    Rank a port name for auto-detection; lower is preferred.
+
+    Nice ordering: lower COM numbers on Windows, TTY ACM/USB on Linux/mac.
+
+    Args:
+        dev: Port name (e.g., 'COM3' or '/dev/ttyACM0')
+        windows: Rank by Windows COM number instead of Linux device type
+
+    Returns:
+        Integer rank; ports with equal rank are ordered by name
+    """
+    if windows:
+        # A regex match instead of int() in try/except: names that are not
+        # COM<n> (e.g. \\.\BTHENUM ports) take no exception path
+        m = _COM_RE.fullmatch(dev)
+        return int(m.group(1)) if m else _NON_COM_RANK
+    if dev.startswith(_PREFERRED_TTY_PREFIXES):
+        return 0
+    return 1
 
 
 def find_pico_port(
@@ -25,10 +367,13 @@ def find_pico_port(
     """
     Scan serial ports and return the first match.
 
+    The port found for a set of criteria is remembered and returned again
+    while it is still present.
+
     Matching criteria:
       - preferred_port if present
       - else VID (if provided) and optional PID
-      - optional product/manufacturer substring hints (case-insensitive)
+      - optional product/manufacturer substring hints (caseless match)
 
     Args:
         preferred_port: Specific port to use if provided
@@ -44,54 +389,117 @@ def find_pico_port(
     if preferred_port:
         return preferred_port
 
-    ports = list(serial.tools.list_ports.comports())
-
-    # Nice ordering: prefer TTY ACM/USB on Linux, COM on Windows
-    def sort_key(p):
-        dev = p.device
-        if platform_hint == "windows":
-            # Prefer lower COM numbers
-            try:
-                if dev.upper().startswith("COM"):
-                    n = int(dev[3:])
-                else:
-                    n = 9999
-            except Exception:
-                n = 9999
-            return (not dev.upper().startswith("COM"), n, dev)
+    # A port found earlier for the same criteria is reused while it is still
+    # present, so reconnects skip the scan entirely
+    key = (vid, pid, product_hint, manufacturer_hint, platform_hint)
+    device = _RESOLVED_PORTS.get(key)
+    if device is not None:
+        if os.name == "nt":
+            present = any(p.device == device for p in _list_ports())
         else:
-            # linux/mac
-            return (
-                not (dev.startswith("/dev/ttyACM") or dev.startswith("/dev/ttyUSB")),
-                dev,
-            )
+            present = os.path.exists(device)
+        if present:
+            return device
+        # The device went away: the cached port list is stale too
+        invalidate_port_cache()
 
-    ports.sort(key=sort_key)
+    device = _scan_for_port(vid, pid, product_hint, manufacturer_hint, platform_hint)
+    if device is not None:
+        _RESOLVED_PORTS[key] = device
+    return device
 
-    product_hint = (product_hint or "").lower()
-    manufacturer_hint = (manufacturer_hint or "").lower()
 
+def _scan_for_port(
+    vid: Optional[int],
+    pid: Optional[int],
+    product_hint: Optional[str],
+    manufacturer_hint: Optional[str],
+    platform_hint: str,
+) -> Optional[str]:
+    """Scan serial ports for the best match (see find_pico_port for the criteria)."""
+    # Logging arguments are only formatted when the level is enabled, so a
+    # non-verbose scan does no per-port string work or console I/O
+    debug = log.isEnabledFor(logging.DEBUG)
+
+    if vid is not None:
+        # Known hardware ID: narrow the scan to matching devices (usually
+        # exactly one), so ranking and hint checks only see those. On Linux
+        # sysfs is read directly instead of enumerating every serial port;
+        # the USB strings are only read if a hint or debug logging uses them.
+        ports = None
+        if sys.platform.startswith("linux"):
+            read_strings = bool(product_hint or manufacturer_hint) or debug
+            ports = _list_usb_ports_linux(vid, pid, read_strings)
+        if ports is None:
+            ports = [
+                p
+                for p in _list_ports()
+                if p.vid == vid and (pid is None or p.pid == pid)
+            ]
+        if not ports:
+            return None
+        if len(ports) == 1 and not product_hint and not manufacturer_hint:
+            log.info("Matched port: %s", ports[0].device)
+            return ports[0].device
+    elif pid is not None:
+        ports = [p for p in _list_ports() if p.pid == pid]
+    else:
+        ports = _list_ports()
+    # Every port left matches the IDs; the loop below only checks hints
+
+    # Hint checks are compiled once into (attribute, casefolded hint, length)
+    # entries for the hints that are actually set. Port strings are only
+    # casefolded for a hint that is set, and a field shorter than
+    # the hint cannot contain it, so it is rejected without casefolding
+    # (USB descriptor strings are ASCII in practice).
+    hint_checks = []
+    for attr, hint in (("product", product_hint), ("manufacturer", manufacturer_hint)):
+        if hint:
+            hint = hint.casefold()
+            hint_checks.append((attr, hint, len(hint)))
+
+    # Only one port is returned, so instead of sorting the whole list a
+    # single pass keeps the best-ranked match. The pass stays sequential:
+    # comports() already read every sysfs/SetupAPI property into
+    # ListPortInfo, so the checks below are plain attribute reads with no
+    # I/O for worker threads to overlap.
+    windows = platform_hint == "windows"
+    best = None
+    best_rank = None
     for p in ports:
-        print(
-            f"Checking port: {p.device}, VID: {p.vid}, PID: {p.pid}, "
-            f"Product: {p.product}, Manufacturer: {p.manufacturer}"
-        )
-        vid_ok = (vid is None) or (p.vid == vid)
-        pid_ok = (pid is None) or (p.pid == pid)
-        product_ok = (
-            True if not product_hint else (product_hint in (p.product or "").lower())
-        )
-        manuf_ok = (
-            True
-            if not manufacturer_hint
-            else (manufacturer_hint in (p.manufacturer or "").lower())
-        )
-        print(
-            f"  vid_ok: {vid_ok}, pid_ok: {pid_ok}, "
-            f"product_ok: {product_ok}, manuf_ok: {manuf_ok}"
-        )
-        if vid_ok and pid_ok and product_ok and manuf_ok:
-            print(f"Matched port: {p.device}")
-            return p.device
+        if debug:
+            log.debug(
+                "Checking port: %s, VID: %s, PID: %s, Product: %s, Manufacturer: %s",
+                p.device,
+                p.vid,
+                p.pid,
+                p.product,
+                p.manufacturer,
+            )
+        # Cheapest test first: a port ranked after the current best cannot
+        # win, so its hint strings are never casefolded (equal ranks fall
+        # back to the device name)
+        dev = p.device
+        rank = _port_rank(dev, windows)
+        if best is not None and (
+            rank > best_rank or (rank == best_rank and dev >= best.device)
+        ):
+            if debug:
+                log.debug("  skipped: ranked after %s", best.device)
+            continue
+        ok = True
+        for attr, hint, hint_len in hint_checks:
+            field = getattr(p, attr) or ""
+            if len(field) < hint_len or hint not in field.casefold():
+                ok = False
+                break
+        if debug:
+            log.debug("  match: %s", ok)
+        if ok:
+            best = p
+            best_rank = rank
 
-    return None
+    if best is None:
+        return None
+    log.info("Matched port: %s", best.device)
+    return best.device